@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Convert the pickled model and vectorizer (.sav) to uncompressed joblib files
+The API memory-maps the arrays in these files instead of copying them into
+every worker. Run once from the backend directory after training the model
+"""
+
+import pickle
+import joblib
+import numpy as np
+
+def convert(name):
+    """Convert <name>.sav to <name>.joblib"""
+    with open(f'{name}.sav', 'rb') as f:
+        artifact = pickle.load(f)
+    
+    # Store the model weights as float32 so they can stay memory-mapped at load.
+    # load_models() vectorizes into float32 to match and refuses to start if the
+    # vectorizer output dtype differs, since mixed dtypes upcast coef_ per call
+    if hasattr(artifact, 'coef_'):
+        artifact.coef_ = artifact.coef_.astype(np.float32)
+        artifact.intercept_ = artifact.intercept_.astype(np.float32)
+    
+    joblib.dump(artifact, f'{name}.joblib', compress=0)
+    print(f"✅ Converted {name}.sav to {name}.joblib")
+
+if __name__ == '__main__':
+    convert('trained_model')
+    convert('vectorizer')
@@ -0,0 +1,19 @@
+"""
+Gunicorn settings for the Sentiment Analysis API
+"""
+
+import multiprocessing
+
+bind = '0.0.0.0:5000'
+
+# One process per core, each serving requests from a small thread pool
+workers = multiprocessing.cpu_count()
+worker_class = 'gthread'
+threads = 4
+
+# Load the model and vectorizer once before forking the workers
+preload_app = True
+
+# Access and error logs to stdout/stderr alongside the app's logging output
+accesslog = '-'
+errorlog = '-'
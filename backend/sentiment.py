@@ -4,182 +4,680 @@ Flask API Backend for Twitter Sentiment Analysis
 This API serves the trained sentiment analysis model and stores tweet history
 """
 
+import functools
+import hashlib
+import logging
+import logging.handlers
 import os
 import pickle
-import re
+import queue
 import sqlite3
+import threading
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from datetime import datetime
+import joblib
+import numpy as np
+import orjson
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 from nltk.corpus import stopwords
 from nltk.stem.porter import PorterStemmer
 import nltk
 
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider that serializes and parses with orjson"""
+    
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Skip the bytes -> str -> bytes round trip of dumps()
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.option), mimetype='application/json'
+        )
+
+# Log records are buffered and written to stderr in batches instead of one
+# write per record; ERROR and above flush the buffer straight away
+_log_stream = logging.StreamHandler()
+_log_stream.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+_log_buffer = logging.handlers.MemoryHandler(
+    capacity=256, flushLevel=logging.ERROR, target=_log_stream
+)
+logging.basicConfig(level=logging.INFO, handlers=[_log_buffer])
+log = logging.getLogger('sentiment')
+
 app = Flask(__name__)
-CORS(app)  # Enable CORS for React frontend
+app.json = ORJSONProvider(app)
+
+# Reject oversized bodies before they are read and parsed. A 280 character
+# tweet fits in 4KB of JSON even when every character is escaped; the app-wide
+# limit leaves room for /api/analyze_batch (max 100 tweets)
+MAX_TWEET_REQUEST_BYTES = 4 * 1024
+app.config['MAX_CONTENT_LENGTH'] = 100 * MAX_TWEET_REQUEST_BYTES
+# Enable CORS for React frontend. Browsers may cache preflight responses for a
+# day, saving an OPTIONS round trip before each POST/DELETE
+CORS(
+    app,
+    resources={r"/api/*": {"origins": os.getenv('CORS_ORIGIN', '*')}},
+    send_wildcard=True,
+    max_age=86400
+)
 
 # Global variables for model and preprocessing
 model = None
 vectorizer = None
+vectorize = None
+model_key = None
 port_stem = None
 stop_words = None
+token_table = None
+
+# Byte table mapping A-Z to a-z, a-z to itself and everything else to a space
+_ALPHA_LOWER = bytes(
+    c + 32 if 65 <= c <= 90 else c if 97 <= c <= 122 else 32
+    for c in range(256)
+)
+
+# SQL used by the request handlers, kept in one place. This is only an
+# organisational refactor: sqlite3 caches prepared statements by SQL text, so
+# the inline literals were already reused and there is no runtime speedup
+SQL_INSERT_TWEET = '''
+    INSERT INTO tweets (text, sentiment, confidence)
+    VALUES (?, ?, ?)
+'''
+SQL_LIST_TWEETS = '''
+    SELECT id, text, sentiment, confidence, timestamp
+    FROM tweets
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+SQL_SENTIMENT_STATS = '''
+    SELECT sentiment, count, confidence_sum
+    FROM sentiment_stats
+    WHERE count > 0
+'''
+SQL_DELETE_TWEET = 'DELETE FROM tweets WHERE id = ?'
+# Formatted with one ? placeholder per hash looked up
+SQL_GET_PREDICTIONS = '''
+    SELECT text_hash, sentiment, confidence
+    FROM predictions
+    WHERE text_hash IN ({})
+'''
+SQL_INSERT_PREDICTION = '''
+    INSERT OR IGNORE INTO predictions (text_hash, sentiment, confidence)
+    VALUES (?, ?, ?)
+'''
+
+# Rows fetched and serialized per chunk when streaming /api/tweets
+TWEETS_CHUNK_SIZE = 25
+
+# Part of the prediction cache key; bump it whenever preprocess_text output
+# changes, so predictions made from the old output are not reused
+PREPROCESS_VERSION = 1
+
+# One SQLite connection per thread, opened lazily by get_conn()
+_tls = threading.local()
+
+def get_conn():
+    """Get this thread's SQLite connection, opening it on first use"""
+    conn = getattr(_tls, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect('tweets.db')
+        try:
+            conn.executescript('''
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                PRAGMA busy_timeout=5000;
+                PRAGMA temp_store=MEMORY;
+                PRAGMA cache_size=-20000;
+            ''')
+        except Exception:
+            conn.close()
+            raise
+        _tls.conn = conn
+    return conn
+
+def close_conn():
+    """Close this thread's SQLite connection, if it has one"""
+    conn = getattr(_tls, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _tls.conn = None
+
+# Tweet inserts are funnelled through a single writer thread so that rows from
+# concurrent requests are committed together (group commit)
+WRITE_BATCH_SIZE = 64
+# Seconds a request waits for the writer before answering with an error
+WRITE_TIMEOUT = 10
+_write_queue = queue.Queue(maxsize=1024)
+_writer_lock = threading.Lock()
+_writer_thread = None
+
+def _start_writer():
+    """Start the writer thread if it is not running in this process"""
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(
+                target=_writer_loop, name='tweet-writer', daemon=True
+            )
+            _writer_thread.start()
+
+def _insert_rows(cursor, rows, prediction_rows):
+    """Insert tweet rows and their new prediction cache rows, returning the tweet ids"""
+    cursor.executemany(SQL_INSERT_PREDICTION, prediction_rows)
+    
+    tweet_ids = []
+    for row in rows:
+        cursor.execute(SQL_INSERT_TWEET, row)
+        tweet_ids.append(cursor.lastrowid)
+    return tweet_ids
+
+def _writer_loop():
+    """Drain queued inserts and commit up to WRITE_BATCH_SIZE requests at once"""
+    while True:
+        # Block for the first request, then take whatever else is already queued
+        batch = [_write_queue.get()]
+        while len(batch) < WRITE_BATCH_SIZE:
+            try:
+                batch.append(_write_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        # Drop requests whose caller already gave up waiting
+        batch = [
+            (rows, prediction_rows, future) for rows, prediction_rows, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        if not batch:
+            continue
+        
+        try:
+            # Opened on first use; if it fails, fail this batch and retry on the next
+            conn = get_conn()
+            cursor = conn.cursor()
+        except Exception as e:
+            log.exception("Error opening database in writer thread")
+            for _, _, future in batch:
+                future.set_exception(e)
+            continue
+        
+        try:
+            with conn:
+                results = [
+                    _insert_rows(cursor, rows, prediction_rows)
+                    for rows, prediction_rows, _ in batch
+                ]
+        except sqlite3.IntegrityError:
+            # A bad row: retry one request per transaction so it only fails its own request
+            for rows, prediction_rows, future in batch:
+                if getattr(future, 'abandoned', False):
+                    # The caller already answered with an error; don't save behind its back
+                    future.set_exception(FutureTimeoutError())
+                    continue
+                try:
+                    with conn:
+                        tweet_ids = _insert_rows(cursor, rows, prediction_rows)
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(tweet_ids)
+        except Exception as e:
+            # Locked/busy and other database-wide errors would hit every retry as
+            # well (each waiting out busy_timeout), so fail the whole batch at once
+            for _, _, future in batch:
+                future.set_exception(e)
+        else:
+            for (_, _, future), tweet_ids in zip(batch, results):
+                future.set_result(tweet_ids)
+
+class TokenTable(dict):
+    """
+    Maps each word to its stem, or to '' for a stopword, filling itself on a miss
+    Looking up a word already seen is a plain dict lookup done entirely in C
+    """
+    
+    def __init__(self, stem, stop_words, maxsize=50000):
+        super().__init__()
+        self.stem = stem
+        self.stop_words = stop_words
+        self.maxsize = maxsize
+    
+    def __missing__(self, word):
+        # Tweet vocabulary is heavily skewed, so starting over when full is cheap
+        if len(self) >= self.maxsize:
+            self.clear()
+        stem = '' if word in self.stop_words else self.stem(word)
+        self[word] = stem
+        return stem
 
 def init_nltk():
     """Initialize NLTK components"""
-    global port_stem, stop_words
+    global port_stem, stop_words, token_table
     try:
         nltk.download('stopwords', quiet=True)
+        # Must match the stemmer the model was trained with; TokenTable caches
+        # its results, so the pure-Python implementation only runs once per word
         port_stem = PorterStemmer()
-        stop_words = set(stopwords.words('english'))
-        print("✅ NLTK initialized successfully")
-        return True
+        stop_words = frozenset(stopwords.words('english'))
+        token_table = TokenTable(port_stem.stem, stop_words)
     except Exception as e:
-        print(f"❌ Error initializing NLTK: {e}")
-        return False
+        raise RuntimeError(f"Error initializing NLTK: {e}") from e
+    log.info("✅ NLTK initialized successfully")
+
+def artifact_path(name):
+    """
+    Path of a trained artifact, preferring the joblib copy made by convert.py
+    whose numpy arrays are memory-mapped and shared between workers
+    """
+    joblib_path = f'{name}.joblib'
+    if os.path.exists(joblib_path):
+        return joblib_path
+    return f'{name}.sav'
+
+def load_artifact(name):
+    """Load a trained artifact from artifact_path()"""
+    path = artifact_path(name)
+    if path.endswith('.joblib'):
+        return joblib.load(path, mmap_mode='r')
+    
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def fingerprint_artifacts(*names):
+    """
+    Key identifying the loaded model files by path, size and modification time,
+    and the preprocessing by PREPROCESS_VERSION, so that cached predictions are
+    not reused after the model is retrained or the preprocessing changes
+    """
+    digest = hashlib.blake2b(f'preprocess:{PREPROCESS_VERSION};'.encode(), digest_size=32)
+    for name in names:
+        path = artifact_path(name)
+        stat = os.stat(path)
+        digest.update(f'{path}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return digest.digest()
+
+def build_fast_vectorizer(vectorizer, dtype=None):
+    """
+    Build a transform equivalent to vectorizer.transform for preprocess_text
+    output (lowercase words separated by spaces). It skips sklearn's regex
+    tokenizer and builds the CSR matrix, of the given dtype (default: the
+    vectorizer's), directly from the fitted vocabulary.
+    Returns None when the vectorizer is configured in a way it doesn't replicate
+    """
+    if (
+        not isinstance(vectorizer, CountVectorizer)
+        or vectorizer.analyzer != 'word'
+        or vectorizer.ngram_range != (1, 1)
+        or vectorizer.tokenizer is not None
+        or vectorizer.preprocessor is not None
+        or vectorizer.stop_words is not None
+        or vectorizer.token_pattern != r"(?u)\b\w\w+\b"
+    ):
+        return None
+    
+    vocabulary = dict(vectorizer.vocabulary_)
+    n_features = len(vocabulary)
+    dtype = dtype or vectorizer.dtype
+    binary = vectorizer.binary
+    
+    is_tfidf = isinstance(vectorizer, TfidfVectorizer)
+    sublinear_tf = is_tfidf and vectorizer.sublinear_tf
+    idf = vectorizer.idf_.astype(dtype) if is_tfidf and vectorizer.use_idf else None
+    norm = vectorizer.norm if is_tfidf else None
+    
+    def transform(texts):
+        indptr = [0]
+        indices = []
+        data = []
+        for text in texts:
+            # The default token pattern keeps words of two or more characters
+            for word, count in Counter(text.split()).items():
+                index = vocabulary.get(word)
+                if index is not None and len(word) > 1:
+                    indices.append(index)
+                    data.append(1 if binary else count)
+            indptr.append(len(indices))
+        
+        X = csr_matrix(
+            (np.asarray(data, dtype=dtype), indices, indptr),
+            shape=(len(texts), n_features)
+        )
+        
+        if sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1
+        if idf is not None:
+            X.data *= idf[X.indices]
+        if norm:
+            X = normalize(X, norm=norm, copy=False)
+        
+        return X
+    
+    return transform
 
 def load_models():
     """Load the trained model and vectorizer"""
-    global model, vectorizer
+    global model, vectorizer, vectorize, model_key
     try:
-        model = pickle.load(open('trained_model.sav', 'rb'))
-        vectorizer = pickle.load(open('vectorizer.sav', 'rb'))
-        print("✅ Models loaded successfully")
-        return True
-    except FileNotFoundError:
-        print("❌ Model files not found. Please train the model first.")
-        return False
+        model = load_artifact('trained_model')
+        vectorizer = load_artifact('vectorizer')
+        
+        # float32 weights halve the memory read by every prediction
+        # (convert.py already stores them as float32, keeping them memory-mapped)
+        if model.coef_.dtype != np.float32:
+            model.coef_ = model.coef_.astype(np.float32)
+            model.intercept_ = model.intercept_.astype(np.float32)
+        
+        # The input matrices must be float32 as well: with float64 input scipy
+        # upcasts all of coef_ to float64 on every decision_function call
+        vectorize = build_fast_vectorizer(vectorizer, dtype=np.float32)
+        if vectorize is None:
+            def vectorize(texts):
+                return vectorizer.transform(texts).astype(np.float32)
+        
+        if vectorize(['']).dtype != model.coef_.dtype:
+            raise RuntimeError("Vectorizer output dtype does not match the model weights")
+        
+        # predict_sentiments() derives the class and confidence from a single
+        # decision score, which only matches predict/predict_proba for a binary
+        # one-vs-rest model (multinomial gives sigmoid(2 * score))
+        if len(model.classes_) != 2:
+            raise RuntimeError(f"Expected a binary model, got classes {model.classes_.tolist()}")
+        if getattr(model, 'multi_class', None) == 'multinomial':
+            raise RuntimeError("Multinomial models are not supported; train with multi_class='ovr'")
+        
+        model_key = fingerprint_artifacts('trained_model', 'vectorizer')
+    except FileNotFoundError as e:
+        raise RuntimeError(
+            "Model files not found. Please train the model first "
+            "(run sentiment_analysis.py)"
+        ) from e
     except Exception as e:
-        print(f"❌ Error loading models: {e}")
-        return False
+        raise RuntimeError(f"Error loading models: {e}") from e
+    log.info("✅ Models loaded successfully")
 
 def init_database():
     """Initialize SQLite database for storing tweets"""
     try:
-        conn = sqlite3.connect('tweets.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tweets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                text TEXT NOT NULL,
-                sentiment TEXT NOT NULL,
-                confidence REAL NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        print("✅ Database initialized successfully")
-        return True
+        conn = get_conn()
+        
+        with conn:
+            # Lock the database so no tweet is inserted between creating the
+            # stats triggers and backfilling the stats table
+            conn.execute('BEGIN IMMEDIATE')
+            
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS tweets (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    text TEXT NOT NULL,
+                    sentiment TEXT NOT NULL,
+                    confidence REAL NOT NULL,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Index-backed ORDER BY for /api/tweets
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_tweets_timestamp
+                ON tweets (timestamp DESC)
+            ''')
+            
+            # /api/stats reads sentiment_stats now, so this index only slowed inserts
+            conn.execute('DROP INDEX IF EXISTS idx_tweets_sentiment')
+            
+            # Running per-sentiment totals, kept up to date by triggers in the
+            # same transaction as each insert/delete, so /api/stats never scans tweets
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS sentiment_stats (
+                    sentiment TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL,
+                    confidence_sum REAL NOT NULL
+                )
+            ''')
+            
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS tweets_stats_insert
+                AFTER INSERT ON tweets
+                BEGIN
+                    INSERT INTO sentiment_stats (sentiment, count, confidence_sum)
+                    VALUES (NEW.sentiment, 1, NEW.confidence)
+                    ON CONFLICT (sentiment) DO UPDATE SET
+                        count = count + 1,
+                        confidence_sum = confidence_sum + excluded.confidence_sum;
+                END
+            ''')
+            
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS tweets_stats_delete
+                AFTER DELETE ON tweets
+                BEGIN
+                    UPDATE sentiment_stats SET
+                        count = count - 1,
+                        confidence_sum = confidence_sum - OLD.confidence
+                    WHERE sentiment = OLD.sentiment;
+                END
+            ''')
+            
+            # Predictions by hash of (model files, preprocessing version, text), so repeated texts skip the model
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS predictions (
+                    text_hash BLOB PRIMARY KEY,
+                    sentiment TEXT NOT NULL,
+                    confidence REAL NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache_meta (
+                    name TEXT PRIMARY KEY,
+                    value BLOB NOT NULL
+                )
+            ''')
+            
+            # Predictions cached under another model key can never be hit
+            # again, so drop them instead of letting them pile up. Under one
+            # key the cache holds at most one row per stored tweet
+            row = conn.execute(
+                "SELECT value FROM cache_meta WHERE name = 'model_key'"
+            ).fetchone()
+            if row is None or row[0] != model_key:
+                conn.execute('DELETE FROM predictions')
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_meta (name, value) VALUES ('model_key', ?)",
+                    (model_key,)
+                )
+            
+            # Backfill the totals for tweets stored before the stats table existed
+            conn.execute('''
+                INSERT INTO sentiment_stats (sentiment, count, confidence_sum)
+                SELECT sentiment, COUNT(*), SUM(confidence)
+                FROM tweets
+                WHERE NOT EXISTS (SELECT 1 FROM sentiment_stats)
+                GROUP BY sentiment
+            ''')
+        
+        # Don't keep the connection open: under gunicorn --preload this runs in
+        # the master process and SQLite connections must not cross a fork
+        close_conn()
     except Exception as e:
-        print(f"❌ Error initializing database: {e}")
-        return False
+        raise RuntimeError(f"Error initializing database: {e}") from e
+    log.info("✅ Database initialized successfully")
 
+@functools.lru_cache(maxsize=4096)
 def preprocess_text(content):
     """
     Preprocess text for sentiment analysis
     Same preprocessing as used in training
     """
-    global port_stem, stop_words
+    # init_nltk() must have run before the first request
+    lookup = token_table.__getitem__
     
-    if not port_stem or not stop_words:
-        return content
+    # Remove all non-alphabetic characters, convert to lowercase and split
+    # into words. Non-ASCII characters become '?' and then a space, matching
+    # re.sub('[^a-zA-Z]', ' ', ...)
+    stemmed_content = (
+        content.encode('ascii', 'replace')
+        .translate(_ALPHA_LOWER)
+        .decode('ascii')
+        .split()
+    )
     
-    # Remove all non-alphabetic characters
-    stemmed_content = re.sub('[^a-zA-Z]', ' ', content)
-    
-    # Convert to lowercase
-    stemmed_content = stemmed_content.lower()
-    
-    # Split into words
-    stemmed_content = stemmed_content.split()
-    
-    # Remove stopwords and apply stemming
-    stemmed_content = [
-        port_stem.stem(word) for word in stemmed_content 
-        if word not in stop_words
-    ]
-    
-    # Join words back into string
-    stemmed_content = ' '.join(stemmed_content)
+    # Remove stopwords, apply stemming and join words back into a string.
+    # map/filter keep the per-token loop in C; only unseen words call into
+    # TokenTable.__missing__
+    stemmed_content = ' '.join(filter(None, map(lookup, stemmed_content)))
     
     return stemmed_content
 
-def predict_sentiment(text):
-    """Predict sentiment for given text"""
-    global model, vectorizer
-    
-    if not model or not vectorizer:
-        return None, 0
-    
-    try:
-        # Preprocess the text
-        processed_text = preprocess_text(text)
-        
-        # Vectorize the text
-        text_vector = vectorizer.transform([processed_text])
-        
-        # Make prediction
-        prediction = model.predict(text_vector)
-        probability = model.predict_proba(text_vector)[0]
-        
-        sentiment = "positive" if prediction[0] == 1 else "negative"
-        confidence = max(probability) * 100
-        
-        return sentiment, confidence
-    except Exception as e:
-        print(f"Error in prediction: {e}")
-        return None, 0
+def hash_text(text):
+    """Prediction cache key for text under the currently loaded model"""
+    return hashlib.blake2b(text.encode(), digest_size=16, key=model_key).digest()
 
-def save_tweet_to_db(text, sentiment, confidence):
-    """Save tweet to database"""
+def get_cached_predictions(text_hashes):
+    """Get {text_hash: (sentiment, confidence)} for hashes in the prediction cache"""
     try:
-        conn = sqlite3.connect('tweets.db')
+        conn = get_conn()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO tweets (text, sentiment, confidence)
-            VALUES (?, ?, ?)
-        ''', (text, sentiment, confidence))
-        
-        tweet_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
-        return tweet_id
-    except Exception as e:
-        print(f"Error saving tweet: {e}")
+        # Look up each distinct hash once, all in a single query
+        text_hashes = list(dict.fromkeys(text_hashes))
+        cursor.execute(
+            SQL_GET_PREDICTIONS.format(','.join('?' * len(text_hashes))),
+            text_hashes
+        )
+        
+        return {
+            text_hash: (sentiment, confidence)
+            for text_hash, sentiment, confidence in cursor.fetchall()
+        }
+    except Exception:
+        log.exception("Error reading prediction cache")
+        return {}
+
+def predict_sentiments(texts):
+    """
+    Predict sentiment for a list of texts with a single model call
+    Texts already predicted by the same model are served from the prediction cache;
+    returns (results, new (text_hash, sentiment, confidence) cache rows), which the
+    caller passes to save_tweets_to_db so they are stored with the tweets
+    """
+    # init_app() refuses to start without the models, so they are always set here
+    try:
+        text_hashes = [hash_text(text) for text in texts]
+        results = get_cached_predictions(text_hashes)
+        
+        misses = [
+            (text_hash, text)
+            for text_hash, text in zip(text_hashes, texts)
+            if text_hash not in results
+        ]
+        
+        rows = []
+        if misses:
+            # Preprocess the texts
+            processed_texts = [preprocess_text(text) for _, text in misses]
+            
+            # Vectorize all texts at once
+            text_vectors = vectorize(processed_texts)
+            
+            # Make predictions. For binary logistic regression predict() is
+            # score > 0 and predict_proba() is the sigmoid of the score, so one
+            # decision_function call gives both the class and the confidence
+            scores = model.decision_function(text_vectors)
+            predictions = model.classes_[(scores > 0).astype(int)]
+            confidences = 100 / (1 + np.exp(-np.abs(scores)))
+            
+            rows = [
+                (text_hash, "positive" if prediction == 1 else "negative", float(confidence))
+                for (text_hash, _), prediction, confidence in zip(misses, predictions, confidences)
+            ]
+            
+            for text_hash, sentiment, confidence in rows:
+                results[text_hash] = (sentiment, confidence)
+        
+        return [results[text_hash] for text_hash in text_hashes], rows
+    except Exception:
+        log.exception("Error in prediction")
+        return None, []
+
+def save_tweets_to_db(rows, prediction_rows=()):
+    """
+    Save (text, sentiment, confidence) rows to database in one transaction,
+    together with any new (text_hash, sentiment, confidence) prediction cache rows
+    """
+    try:
+        _start_writer()
+        
+        future = Future()
+        _write_queue.put((rows, prediction_rows, future), timeout=WRITE_TIMEOUT)
+        
+        return future.result(timeout=WRITE_TIMEOUT)
+    except (queue.Full, FutureTimeoutError):
+        # If the writer already started on the rows they may still be saved;
+        # mark the request so that a row-by-row retry skips it
+        if not future.cancel():
+            future.abandoned = True
+            log.error("Timed out waiting for the tweet writer; rows may still be saved")
+        else:
+            log.error("Timed out waiting for the tweet writer")
+        return None
+    except Exception:
+        log.exception("Error saving tweets")
         return None
 
 def get_tweets_from_db(limit=50):
-    """Get tweets from database"""
+    """Get tweets from database as a generator of lists of up to TWEETS_CHUNK_SIZE"""
     try:
-        conn = sqlite3.connect('tweets.db')
+        conn = get_conn()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT id, text, sentiment, confidence, timestamp
-            FROM tweets
-            ORDER BY timestamp DESC
-            LIMIT ?
-        ''', (limit,))
-        
-        tweets = []
-        for row in cursor.fetchall():
-            tweets.append({
-                'id': row[0],
-                'text': row[1],
-                'sentiment': row[2],
-                'confidence': round(row[3], 2),
-                'timestamp': row[4]
-            })
-        
-        conn.close()
-        return tweets
-    except Exception as e:
-        print(f"Error fetching tweets: {e}")
-        return []
+        cursor.execute(SQL_LIST_TWEETS, (limit,))
+    except Exception:
+        log.exception("Error fetching tweets")
+        return iter(())
+    
+    def chunks():
+        try:
+            while True:
+                rows = cursor.fetchmany(TWEETS_CHUNK_SIZE)
+                if not rows:
+                    break
+                
+                yield [
+                    {
+                        'id': row[0],
+                        'text': row[1],
+                        'sentiment': row[2],
+                        'confidence': round(row[3], 2),
+                        'timestamp': row[4]
+                    }
+                    for row in rows
+                ]
+        except Exception:
+            # The response is already being sent; re-raise so it is cut off
+            # instead of ending as a well-formed but incomplete list
+            log.exception("Error fetching tweets")
+            raise
+    
+    return chunks()
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    """Return a JSON error for request bodies over the size limit"""
+    return jsonify({'error': 'Request body too large'}), 413
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -193,8 +691,11 @@ def health_check():
 @app.route('/api/analyze', methods=['POST'])
 def analyze_sentiment():
     """Analyze sentiment of a tweet"""
+    if (request.content_length or 0) > MAX_TWEET_REQUEST_BYTES:
+        raise RequestEntityTooLarge()
+    
     try:
-        data = request.get_json()
+        data = request.get_json(cache=False)
         
         if not data or 'text' not in data:
             return jsonify({'error': 'Tweet text is required'}), 400
@@ -208,17 +709,21 @@ def analyze_sentiment():
             return jsonify({'error': 'Tweet text too long (max 280 characters)'}), 400
         
         # Predict sentiment
-        sentiment, confidence = predict_sentiment(tweet_text)
+        results, prediction_rows = predict_sentiments([tweet_text])
         
-        if sentiment is None:
+        if results is None:
             return jsonify({'error': 'Failed to analyze sentiment'}), 500
         
+        sentiment, confidence = results[0]
+        
         # Save to database
-        tweet_id = save_tweet_to_db(tweet_text, sentiment, confidence)
+        tweet_ids = save_tweets_to_db([(tweet_text, sentiment, confidence)], prediction_rows)
         
-        if tweet_id is None:
+        if tweet_ids is None:
             return jsonify({'error': 'Failed to save tweet'}), 500
         
+        tweet_id = tweet_ids[0]
+        
         return jsonify({
             'id': tweet_id,
             'text': tweet_text,
@@ -227,8 +732,73 @@ def analyze_sentiment():
             'message': 'Sentiment analyzed successfully'
         })
         
-    except Exception as e:
-        print(f"Error in analyze endpoint: {e}")
+    except RequestEntityTooLarge:
+        raise
+    except Exception:
+        log.exception("Error in analyze endpoint")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/analyze_batch', methods=['POST'])
+def analyze_sentiment_batch():
+    """Analyze sentiment of several tweets in one request"""
+    try:
+        data = request.get_json(cache=False)
+        
+        if not isinstance(data, dict) or not isinstance(data.get('texts'), list):
+            return jsonify({'error': 'A list of tweet texts is required'}), 400
+        
+        if not data['texts']:
+            return jsonify({'error': 'Tweet texts cannot be empty'}), 400
+        
+        if len(data['texts']) > 100:  # Max 100 tweets per request
+            return jsonify({'error': 'Too many tweets (max 100 per request)'}), 400
+        
+        tweet_texts = []
+        for index, text in enumerate(data['texts']):
+            if not isinstance(text, str) or not text.strip():
+                return jsonify({'error': f'Tweet text at index {index} cannot be empty'}), 400
+            
+            if len(text.strip()) > 280:  # Twitter character limit
+                return jsonify({'error': f'Tweet text at index {index} too long (max 280 characters)'}), 400
+            
+            tweet_texts.append(text.strip())
+        
+        # Predict sentiment for all tweets at once
+        results, prediction_rows = predict_sentiments(tweet_texts)
+        
+        if results is None:
+            return jsonify({'error': 'Failed to analyze sentiment'}), 500
+        
+        # Save to database
+        rows = [
+            (text, sentiment, confidence)
+            for text, (sentiment, confidence) in zip(tweet_texts, results)
+        ]
+        tweet_ids = save_tweets_to_db(rows, prediction_rows)
+        
+        if tweet_ids is None:
+            return jsonify({'error': 'Failed to save tweets'}), 500
+        
+        tweets = [
+            {
+                'id': tweet_id,
+                'text': text,
+                'sentiment': sentiment,
+                'confidence': round(confidence, 2)
+            }
+            for tweet_id, (text, sentiment, confidence) in zip(tweet_ids, rows)
+        ]
+        
+        return jsonify({
+            'tweets': tweets,
+            'count': len(tweets),
+            'message': 'Sentiment analyzed successfully'
+        })
+        
+    except RequestEntityTooLarge:
+        raise
+    except Exception:
+        log.exception("Error in analyze_batch endpoint")
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/tweets', methods=['GET'])
@@ -238,99 +808,105 @@ def get_tweets():
         limit = request.args.get('limit', 50, type=int)
         limit = min(limit, 100)  # Max 100 tweets per request
         
-        tweets = get_tweets_from_db(limit)
+        tweet_chunks = get_tweets_from_db(limit)
         
-        return jsonify({
-            'tweets': tweets,
-            'count': len(tweets)
-        })
+        def generate():
+            # Stream the response a chunk of rows at a time instead of
+            # building the whole list and its JSON copy in memory
+            count = 0
+            yield b'{"tweets":['
+            for tweets in tweet_chunks:
+                body = b','.join(map(orjson.dumps, tweets))
+                yield body if count == 0 else b',' + body
+                count += len(tweets)
+            yield b'],"count":%d}' % count
         
-    except Exception as e:
-        print(f"Error in get_tweets endpoint: {e}")
+        return app.response_class(generate(), mimetype='application/json')
+        
+    except Exception:
+        log.exception("Error in get_tweets endpoint")
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get sentiment analysis statistics"""
     try:
-        conn = sqlite3.connect('tweets.db')
+        conn = get_conn()
         cursor = conn.cursor()
         
-        # Get total count
-        cursor.execute('SELECT COUNT(*) FROM tweets')
-        total_tweets = cursor.fetchone()[0]
-        
-        # Get sentiment distribution
-        cursor.execute('''
-            SELECT sentiment, COUNT(*) as count, AVG(confidence) as avg_confidence
-            FROM tweets
-            GROUP BY sentiment
-        ''')
+        # Get sentiment distribution from the running totals
+        cursor.execute(SQL_SENTIMENT_STATS)
         
+        total_tweets = 0
         sentiment_stats = {}
-        for row in cursor.fetchall():
-            sentiment_stats[row[0]] = {
-                'count': row[1],
-                'avg_confidence': round(row[2], 2) if row[2] else 0
+        for sentiment, count, confidence_sum in cursor.fetchall():
+            avg_confidence = confidence_sum / count
+            sentiment_stats[sentiment] = {
+                'count': count,
+                'avg_confidence': round(avg_confidence, 2) if avg_confidence else 0
             }
-        
-        conn.close()
+            total_tweets += count
         
         return jsonify({
             'total_tweets': total_tweets,
             'sentiment_distribution': sentiment_stats
         })
         
-    except Exception as e:
-        print(f"Error in stats endpoint: {e}")
+    except Exception:
+        log.exception("Error in stats endpoint")
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/delete/<int:tweet_id>', methods=['DELETE'])
 def delete_tweet(tweet_id):
     """Delete a tweet"""
     try:
-        conn = sqlite3.connect('tweets.db')
-        cursor = conn.cursor()
+        conn = get_conn()
         
-        cursor.execute('DELETE FROM tweets WHERE id = ?', (tweet_id,))
+        with conn:
+            cursor = conn.execute(SQL_DELETE_TWEET, (tweet_id,))
         
         if cursor.rowcount == 0:
-            conn.close()
             return jsonify({'error': 'Tweet not found'}), 404
         
-        conn.commit()
-        conn.close()
-        
         return jsonify({'message': 'Tweet deleted successfully'})
         
-    except Exception as e:
-        print(f"Error in delete endpoint: {e}")
+    except Exception:
+        log.exception("Error in delete endpoint")
         return jsonify({'error': 'Internal server error'}), 500
 
+def init_app():
+    """
+    Initialize NLTK, the models and the database before serving requests
+    Raises RuntimeError if any of them fails, so the server never starts without them
+    """
+    init_nltk()
+    load_models()
+    init_database()
+    log.info("✅ All components initialized successfully")
+    
+    # Show the startup messages now, and don't leave buffered records behind
+    # to be written again by every worker forked under gunicorn --preload
+    _log_buffer.flush()
+
 if __name__ == '__main__':
-    print("🚀 Starting Sentiment Analysis API...")
+    log.info("🚀 Starting Sentiment Analysis API...")
     
     # Initialize components
-    if not init_nltk():
-        print("❌ Failed to initialize NLTK. Exiting.")
-        exit(1)
-    
-    if not load_models():
-        print("❌ Failed to load models. Please train the model first.")
-        print("Run sentiment_analysis.py to train the model.")
-        exit(1)
-    
-    if not init_database():
-        print("❌ Failed to initialize database. Exiting.")
+    try:
+        init_app()
+    except RuntimeError as e:
+        log.error("❌ %s. Exiting.", e)
         exit(1)
     
-    print("✅ All components initialized successfully")
     print("🌐 API will be available at: http://localhost:5000")
     print("📋 API Endpoints:")
     print("   POST /api/analyze - Analyze sentiment")
+    print("   POST /api/analyze_batch - Analyze sentiment of several tweets")
     print("   GET  /api/tweets  - Get all tweets")
     print("   GET  /api/stats   - Get statistics")
     print("   GET  /api/health  - Health check")
     
-    # Run the Flask app
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Run the Flask app. The debugger and reloader add per-request overhead, so
+    # they are only enabled with DEBUG=1; use gunicorn (wsgi.py) in production
+    debug = os.getenv('DEBUG', '').lower() in ('1', 'true', 'yes')
+    app.run(debug=debug, host='0.0.0.0', port=5000)
\ No newline at end of file
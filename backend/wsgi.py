@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for serving the Sentiment Analysis API with gunicorn
+Run from the backend directory with: gunicorn wsgi:app
+Settings (workers, threads, preload) are read from gunicorn.conf.py
+Any threaded WSGI server works too, e.g.: waitress-serve --threads=8 wsgi:app
+"""
+
+import sys
+
+from sentiment import app, init_app
+
+# Nothing on the request path writes to stdout; don't flush it on every newline
+sys.stdout.reconfigure(line_buffering=False)
+
+# Initialize at import time so that with --preload the models are loaded once
+# in the master process and shared copy-on-write by the forked workers.
+# Raises RuntimeError, stopping gunicorn, if the models can't be loaded
+init_app()